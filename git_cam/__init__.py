@@ -5,4 +5,12 @@ __version__ = "0.1.0"
 from .main import main
 from .utils import *
 from .classes import CLIFormatter
-from .recheck import analyze_repository
+
+
+def __getattr__(name):
+    # recheck pulls in pathspec, so only import it when analyze_repository is actually used
+    if name == "analyze_repository":
+        from .recheck import analyze_repository
+
+        return analyze_repository
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
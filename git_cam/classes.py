@@ -1,7 +1,33 @@
+import sys
 from colorama import init, Fore, Back, Style
 
-# Initialize colorama for cross-platform color support
-init()
+
+class _NoColor:
+    """Stand-in for colorama's Fore/Back/Style that turns every color code into an empty string."""
+
+    def __getattr__(self, name):
+        return ""
+
+
+if sys.stdout.isatty():
+    # Initialize colorama for cross-platform color support
+    init()
+else:
+    # Output is piped or redirected: skip colorama's stream wrapping and write plain text
+    Fore = Back = Style = _NoColor()
+
+# Formatting strings are fixed for the life of the process, so build them once
+_RESET = Style.RESET_ALL
+_HEADER_PREFIX = f"\n{Fore.CYAN}{Style.BRIGHT}=== "
+_HEADER_SUFFIX = f" ==={_RESET}\n"
+_SUCCESS_PREFIX = f"{Fore.GREEN}{Style.BRIGHT}✓ "
+_ERROR_PREFIX = f"{Fore.RED}{Style.BRIGHT}✗ "
+_WARNING_PREFIX = f"{Fore.YELLOW}{Style.BRIGHT}⚠ "
+_INPUT_PROMPT_PREFIX = f"{Fore.BLUE}{Style.BRIGHT}> "
+_SEPARATOR = f"{Fore.BLUE}{Style.DIM}{'─' * 80}{_RESET}"
+_DIFF_HEADER = f"{Back.BLUE}{Fore.WHITE}{Style.BRIGHT} DIFF {_RESET}"
+_REVIEW_HEADER = f"{Back.GREEN}{Fore.WHITE}{Style.BRIGHT} REVIEW {_RESET}"
+_MESSAGE_HEADER = f"{Back.MAGENTA}{Fore.WHITE}{Style.BRIGHT} COMMIT MESSAGE {_RESET}"
 
 
 class CLIFormatter:
@@ -10,46 +36,44 @@ class CLIFormatter:
     @staticmethod
     def header(text):
         """Format section headers"""
-        return f"\n{Fore.CYAN}{Style.BRIGHT}=== {text} ==={Style.RESET_ALL}\n"
+        return "".join((_HEADER_PREFIX, text, _HEADER_SUFFIX))
 
     @staticmethod
     def success(text):
         """Format success messages"""
-        return f"{Fore.GREEN}{Style.BRIGHT}✓ {text}{Style.RESET_ALL}"
+        return "".join((_SUCCESS_PREFIX, text, _RESET))
 
     @staticmethod
     def error(text):
         """Format error messages"""
-        return f"{Fore.RED}{Style.BRIGHT}✗ {text}{Style.RESET_ALL}"
+        return "".join((_ERROR_PREFIX, text, _RESET))
 
     @staticmethod
     def warning(text):
         """Format warning messages"""
-        return f"{Fore.YELLOW}{Style.BRIGHT}⚠ {text}{Style.RESET_ALL}"
+        return "".join((_WARNING_PREFIX, text, _RESET))
 
     @staticmethod
     def input_prompt(text):
         """Format input prompts"""
-        return f"{Fore.BLUE}{Style.BRIGHT}> {text}{Style.RESET_ALL}"
+        return "".join((_INPUT_PROMPT_PREFIX, text, _RESET))
 
     @staticmethod
     def separator():
         """Return a separator line"""
-        return f"{Fore.BLUE}{Style.DIM}{'─' * 80}{Style.RESET_ALL}"
+        return _SEPARATOR
 
     @staticmethod
     def diff_header():
         """Return a diff section header"""
-        return f"{Back.BLUE}{Fore.WHITE}{Style.BRIGHT} DIFF {Style.RESET_ALL}"
+        return _DIFF_HEADER
 
     @staticmethod
     def review_header():
         """Return a review section header"""
-        return f"{Back.GREEN}{Fore.WHITE}{Style.BRIGHT} REVIEW {Style.RESET_ALL}"
+        return _REVIEW_HEADER
 
     @staticmethod
     def message_header():
         """Return a message section header"""
-        return (
-            f"{Back.MAGENTA}{Fore.WHITE}{Style.BRIGHT} COMMIT MESSAGE {Style.RESET_ALL}"
-        )
+        return _MESSAGE_HEADER
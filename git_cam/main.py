@@ -1,13 +1,16 @@
 #!/usr/bin/env python
 import sys
 import os
-import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from git_cam.utils import (
+    NotAGitRepositoryError,
     get_git_config_key,
     setup_api_key,
     get_git_config_model,
     get_filtered_diff,
+    get_contextual_history,
     get_git_config_instructions,
     perform_code_review,
     generate_commit_message,
@@ -23,33 +26,24 @@ from git_cam.utils import (
     should_run_hooks,
     run_precommit_hooks,
 )
-from git_cam.recheck import analyze_repository
 from git_cam.classes import CLIFormatter
 
+VERSION_STRING = "git-cam version 0.2.3"
 
-def is_git_repo() -> bool:
-    """Check if current directory is inside a git repository."""
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--is-inside-work-tree"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding="utf-8",
-            check=False,  # Don't raise on error
-        )
-        return result.returncode == 0 and result.stdout.strip() == "true"
-    except Exception:
-        return False
+# Status markers a code review can end with, in the order they are checked
+_REVIEW_STATUSES = ("STOP_COMMIT", "NOTICE", "OK")
 
 
+@lru_cache(maxsize=1)
 def create_parser():
     """
-    Create and configure the argument parser for git-cam.
+    Create and configure the argument parser for git-cam (built once per process).
 
     Returns:
         argparse.ArgumentParser: Configured parser with all commands and options
     """
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="AI-powered Git commit message generator using Claude",
         add_help=False,  # Disable default help since we're handling it ourselves
@@ -86,7 +80,7 @@ def create_parser():
         action="store_true",
         help="Configure your Anthropic API key, model, and other preferences",
     )
-    parser.add_argument("--version", action="version", version="git-cam version 0.2.3")
+    parser.add_argument("--version", action="version", version=VERSION_STRING)
     parser.add_argument(
         "--add-instruction",
         type=str,
@@ -185,19 +179,23 @@ def stage_all_files():
     subprocess.run(["git", "add", "-A"])
 
 
-def has_critical_issues(review: str) -> bool:
+def review_status(review: str) -> str:
     """
-    Check if the code review contains critical issues that should block commits.
+    Classify a code review by the status marker it ends with.
 
     Args:
         review: The review text from the AI code review
 
     Returns:
-        bool: True if critical issues are found (review ends with STOP_COMMIT)
+        str: "STOP_COMMIT", "NOTICE" or "OK", or "" if the review has no recognised ending
     """
-    # Only consider it a critical issue if the review ENDS with STOP_COMMIT
-    # This prevents false positives when STOP_COMMIT is mentioned in context
-    return review.strip().endswith("STOP_COMMIT")
+    # Only the ENDING counts, which prevents false positives when e.g. STOP_COMMIT is mentioned
+    # in context. Strip once here rather than at every branch that needs the status
+    tail = review.rstrip()
+    for status in _REVIEW_STATUSES:
+        if tail.endswith(status):
+            return status
+    return ""
 
 
 def handle_critical_issues_in_auto_mode(review: str) -> tuple[bool, str]:
@@ -285,20 +283,80 @@ def run_precommit_with_auto_restage(is_auto_mode: bool = False) -> bool:
     return hooks_passed
 
 
+def _read_choice() -> str:
+    """
+    Read a single-key answer without waiting for the user to press Enter.
+
+    Falls back to reading a whole line when stdin is not a terminal (e.g. piped input).
+
+    Returns:
+        str: The lowercased key, or "" if the user pressed Enter
+    """
+    # Make sure the prompt is visible before blocking; stdout is block-buffered when piped (e.g. to tee)
+    sys.stdout.flush()
+
+    if not sys.stdin.isatty():
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError
+        return line.strip().lower()
+
+    if os.name == "nt":
+        import msvcrt
+
+        key = msvcrt.getwch()
+        if key == "\x03":
+            raise KeyboardInterrupt
+    else:
+        import termios
+        import tty
+
+        fd = sys.stdin.fileno()
+        old_settings = termios.tcgetattr(fd)
+        try:
+            # cbreak rather than raw mode so Ctrl+C still raises KeyboardInterrupt
+            tty.setcbreak(fd)
+            key = sys.stdin.read(1)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+    if key in ("\r", "\n"):
+        print()
+        return ""
+    # The terminal doesn't echo in cbreak mode, so show what was pressed
+    print(key)
+    return key.lower()
+
+
+# Single-argument invocations that don't need the argument parser
+_FAST_PATHS = {
+    "help": show_help,
+    "--version": lambda: print(VERSION_STRING),
+    "--show-instructions": show_instructions,
+    "--show-token-limit": show_token_limit,
+    "--show-history-limit": show_history_limit,
+}
+
+
+# Configuration options, checked in order against the parsed arguments
+_SIMPLE_DISPATCH = {
+    "setup": lambda args: setup_api_key(),
+    "add_instruction": lambda args: append_instruction(args.add_instruction),
+    "set_instructions": lambda args: set_instructions(args.set_instructions),
+    "show_instructions": lambda args: show_instructions(),
+    "set_token_limit": lambda args: set_token_limit(args.set_token_limit),
+    "show_token_limit": lambda args: show_token_limit(),
+    "set_history_limit": lambda args: set_history_limit(args.set_history_limit),
+    "show_history_limit": lambda args: show_history_limit(),
+}
+
+
 def main():
     try:
-        parser = create_parser()
-        args = parser.parse_args(sys.argv[1:])
-
-        # Skip git repository validation for help and version commands
-        if len(sys.argv) > 1 and sys.argv[1] in ["--help", "--version", "help"]:
-            pass
-        else:
-            if not is_git_repo():
-                print(CLIFormatter.error("Could not access a git repository here (or any parent up to mount point /)"))
-                print(CLIFormatter.error("Check your folder and permissions (running 'git status' may yield clues)"))
-                print(CLIFormatter.error("Stopping at filesystem boundary (GIT_DISCOVERY_ACROSS_FILESYSTEM not set)"))
-                sys.exit(1)
+        # Simple single-argument invocations are dispatched directly, without loading argparse
+        if len(sys.argv) == 2 and sys.argv[1] in _FAST_PATHS:
+            _FAST_PATHS[sys.argv[1]]()
+            return
 
         parser = create_parser()
         args = parser.parse_args(sys.argv[1:])
@@ -308,37 +366,11 @@ def main():
             show_help()
             return
 
-        if args.setup:
-            setup_api_key()
-            return
-
-        if args.add_instruction:
-            append_instruction(args.add_instruction)
-            return
-
-        if args.set_instructions:
-            set_instructions(args.set_instructions)
-            return
-
-        if args.show_instructions:
-            show_instructions()
-            return
-
-        if args.set_token_limit:
-            set_token_limit(args.set_token_limit)
-            return
-
-        if args.show_token_limit:
-            show_token_limit()
-            return
-
-        if args.set_history_limit:
-            set_history_limit(args.set_history_limit)
-            return
-
-        if args.show_history_limit:
-            show_history_limit()
-            return
+        # Handle configuration options; the first one given wins
+        for option, handler in _SIMPLE_DISPATCH.items():
+            if getattr(args, option):
+                handler(args)
+                return
 
         # Get API configuration
         api_key = get_git_config_key()
@@ -355,6 +387,8 @@ def main():
 
         # Handle recheck command
         if args.command == "recheck":
+            from git_cam.recheck import analyze_repository
+
             query = getattr(args, "query", None)
             analyze_repository(api_key, api_model, config_instructions, query)
             return
@@ -365,11 +399,16 @@ def main():
             stage_all_files()
 
         # Get staged changes for review and commit message generation
-        diff = get_filtered_diff()
+        diff, omitted_files = get_filtered_diff()
         if not diff:
             print(CLIFormatter.error("No changes staged for commit"))
             sys.exit(1)
 
+        # Gather git history in the background so it overlaps with the prompts below
+        history_executor = ThreadPoolExecutor(max_workers=1)
+        history_future = history_executor.submit(get_contextual_history)
+        history_executor.shutdown(wait=False)
+
         # Run pre-commit hooks if configured and not skipped
         skip_git_hooks = False  # Only set to True if we actually need to bypass hooks
         hook_bypass_reason = ""  # Track reason for bypassing hooks
@@ -469,39 +508,48 @@ def main():
                         hook_bypass_reason = "Manual pre-commit check passed"
 
                 # Update staged diff after running pre-commit hooks (important for auto-fixes)
-                updated_diff = get_filtered_diff()
+                updated_diff, omitted_files = get_filtered_diff()
                 if not updated_diff:
                     print(CLIFormatter.error("No changes staged after pre-commit hooks"))
                     sys.exit(1)
                 diff = updated_diff
 
-        # Display diff preview in verbose mode
+        # Report left-out files once, for the diff that is actually sent
+        for file in omitted_files:
+            print(CLIFormatter.warning(f"Left the changes to '{file}' out of the diff: too large to send to Claude"))
+
+        # Display diff preview in verbose mode (one write for the whole section)
         if args.verbose:
-            print(CLIFormatter.header("Diff Preview"))
-            print(CLIFormatter.diff_header())
-            print(diff)
-            print(CLIFormatter.separator())
             token_count = estimate_tokens(diff)
-            print(f"\nEstimated tokens: {token_count} (NOTE: Just a rough guess!)")
-            print(CLIFormatter.input_prompt("Press Enter to continue or Ctrl+C to cancel..."))
-            input()
+            parts = [
+                CLIFormatter.header("Diff Preview"),
+                CLIFormatter.diff_header(),
+                diff,
+                CLIFormatter.separator(),
+                f"\nEstimated tokens: {token_count} (NOTE: Just a rough guess!)",
+                CLIFormatter.input_prompt("Press Enter to continue or Ctrl+C to cancel..."),
+            ]
+            sys.stdout.write("\n".join(parts) + "\n")
+            _read_choice()
+
+        # Both the review and the commit message use the prefetched history
+        history_context = history_future.result()
 
         # Perform AI code review of changes
         print("\nReviewing changes...", end="", flush=True)
         try:
-            review = perform_code_review(diff, api_key, api_model, config_instructions)
+            review = perform_code_review(diff, api_key, api_model, config_instructions, history_context)
+            status = review_status(review)
 
             # Handle auto-commit mode (--all flag)
             if args.all:
-                has_critical = has_critical_issues(review)
-
-                if has_critical:
+                if status == "STOP_COMMIT":
                     # Handle critical issues in auto-commit mode with user interaction
                     should_continue, user_context = handle_critical_issues_in_auto_mode(review)
                     if not should_continue:
                         sys.exit(1)
                     # If we reach here, user wants to continue with the provided context
-                elif review.strip().endswith("NOTICE"):
+                elif status == "NOTICE":
                     # Show notice and ask user to confirm in auto-commit mode
                     print(CLIFormatter.warning("\nCode review found issues that need attention:"))
                     clean_review = review.replace("NOTICE", "").strip()
@@ -543,32 +591,35 @@ def main():
                     user_context = ""  # OK case - no user context in auto mode when no issues
             else:
                 # Handle interactive mode - show review and get user input
-                print(CLIFormatter.header("Code Review"))
-                print(CLIFormatter.review_header())
-
                 # Format review with red STOP_COMMIT highlighting if present
                 formatted_review = review
                 if "STOP_COMMIT" in review:
                     formatted_review = review.replace("STOP_COMMIT", CLIFormatter.error("STOP_COMMIT"))
 
                 # Determine review status based on ending, not content
-                if review.strip().endswith("STOP_COMMIT"):
+                if status == "STOP_COMMIT":
                     # Critical issues - red
-                    print(CLIFormatter.error(formatted_review))
-                elif review.strip().endswith("NOTICE"):
+                    formatted_review = CLIFormatter.error(formatted_review)
+                elif status == "NOTICE":
                     # Minor issues/suggestions - yellow
-                    print(CLIFormatter.warning(formatted_review))
-                elif review.strip().endswith("OK"):
+                    formatted_review = CLIFormatter.warning(formatted_review)
+                elif status == "OK":
                     # All good - green
-                    print(CLIFormatter.success(formatted_review))
+                    formatted_review = CLIFormatter.success(formatted_review)
                 else:
                     # Fallback for unexpected responses - yellow
-                    print(CLIFormatter.warning(formatted_review))
+                    formatted_review = CLIFormatter.warning(formatted_review)
 
-                print(CLIFormatter.separator())
+                parts = [
+                    CLIFormatter.header("Code Review"),
+                    CLIFormatter.review_header(),
+                    formatted_review,
+                    CLIFormatter.separator(),
+                ]
+                sys.stdout.write("\n".join(parts) + "\n")
 
                 # Different prompts based on review result
-                if review.strip().endswith("STOP_COMMIT"):
+                if status == "STOP_COMMIT":
                     # Critical issues - default to cancel
                     print(
                         CLIFormatter.input_prompt(
@@ -610,27 +661,35 @@ def main():
             print(CLIFormatter.error(f"\nError during code review: {str(e)}"))
             sys.exit(1)
 
-        # Generate commit message and handle user interaction
+        # Generate commit message and handle user interaction. Inputs are fixed for the
+        # rest of the run, so only call the API on the first pass or an explicit (r)egenerate;
+        # an unrecognised answer just shows the same message again
+        message = None
         while True:
             try:
-                message = generate_commit_message(
-                    diff,
-                    review,
-                    user_context,
-                    config_instructions,
-                    api_key,
-                    api_model,
-                    skip_git_hooks,
-                    hook_bypass_reason,
-                )
+                if message is None:
+                    message = generate_commit_message(
+                        diff,
+                        review,
+                        user_context,
+                        config_instructions,
+                        api_key,
+                        api_model,
+                        skip_git_hooks,
+                        hook_bypass_reason,
+                        history_context,
+                    )
                 if not args.all:  # Interactive mode - show message preview and get user choice
-                    print(CLIFormatter.header("Generated Commit Message"))
-                    print(CLIFormatter.message_header())
-                    print(f"\n{message}\n")
-                    print(CLIFormatter.separator())
-                    print(CLIFormatter.input_prompt("(A)ccept, (c)ancel, or (r)egenerate? (ENTER accepts by default)"))
-
-                    choice = input().lower()
+                    parts = [
+                        CLIFormatter.header("Generated Commit Message"),
+                        CLIFormatter.message_header(),
+                        f"\n{message}\n",
+                        CLIFormatter.separator(),
+                        CLIFormatter.input_prompt("(A)ccept, (c)ancel, or (r)egenerate? (ENTER accepts by default)"),
+                    ]
+                    sys.stdout.write("\n".join(parts) + "\n")
+
+                    choice = _read_choice()
                     if choice == "a" or choice == "":
                         # Use --no-verify if we already handled failed hooks
                         commit_cmd = ["git", "commit", "-m", message]
@@ -649,6 +708,7 @@ def main():
                         break
                     elif choice == "r":
                         print(CLIFormatter.input_prompt("Regenerating commit message..."))
+                        message = None
                         continue
                 else:  # Auto-commit mode - commit immediately without prompting
                     # Use --no-verify if we already handled failed hooks
@@ -658,9 +718,12 @@ def main():
 
                     result = subprocess.run(commit_cmd, capture_output=True, text=True)
                     if result.returncode == 0:
-                        print(CLIFormatter.success("Changes committed successfully!"))
-                        print(CLIFormatter.message_header())
-                        print(f"\n{message}\n")
+                        parts = [
+                            CLIFormatter.success("Changes committed successfully!"),
+                            CLIFormatter.message_header(),
+                            f"\n{message}\n",
+                        ]
+                        sys.stdout.write("\n".join(parts) + "\n")
                         break
                     else:
                         print(CLIFormatter.error(f"Git commit failed: {result.stderr.strip()}"))
@@ -669,6 +732,11 @@ def main():
                 print(CLIFormatter.error(f"Error: {str(e)}"))
                 sys.exit(1)
 
+    except NotAGitRepositoryError:
+        print(CLIFormatter.error("Could not access a git repository here (or any parent up to mount point /)"))
+        print(CLIFormatter.error("Check your folder and permissions (running 'git status' may yield clues)"))
+        print(CLIFormatter.error("Stopping at filesystem boundary (GIT_DISCOVERY_ACROSS_FILESYSTEM not set)"))
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\n" + CLIFormatter.warning("Operation cancelled by user"))
         os._exit(0)
@@ -1,9 +1,8 @@
 import os
 from typing import List, Dict, Tuple
-from anthropic import Anthropic
 from git_cam.classes import CLIFormatter
 import subprocess
-from git_cam.utils import get_git_config_token_limit
+from git_cam.utils import get_git_config_token_limit, NotAGitRepositoryError
 from pathlib import Path
 import pathspec  # New import for handling gitignore patterns
 
@@ -229,13 +228,18 @@ def load_batch_contents(batch: List[Dict]) -> List[Dict]:
 
 def analyze_repository(api_key: str, api_model: str, config_instructions: str, question: str = None) -> str:
     """Analyze entire repository for improvements."""
+    from anthropic import Anthropic
+
     client = Anthropic(api_key=api_key)
 
     # Get repository root
-    repo_root = subprocess.run(
+    result = subprocess.run(
         ["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True,
         encoding='utf-8'
-    ).stdout.strip()
+    )
+    if result.returncode != 0:
+        raise NotAGitRepositoryError(result.stderr.strip())
+    repo_root = result.stdout.strip()
 
     # Load gitignore patterns
     gitignore_spec = get_gitignore_spec(repo_root)
@@ -313,9 +317,9 @@ def analyze_repository(api_key: str, api_model: str, config_instructions: str, q
         
         for file_info in batch:
             batch_summary.append(f"\nFile: {file_info['path']}\n")
-            batch_summary.append("[START OF FILE '" + file_info["path"] + "']")
+            batch_summary.append(f"[START OF FILE '{file_info['path']}']")
             batch_summary.append(file_info["content"])
-            batch_summary.append("[END OF FILE '" + file_info["path"] + "']")
+            batch_summary.append(f"[END OF FILE '{file_info['path']}']")
         try:
 
             # Build context-aware prompt
@@ -1,6 +1,40 @@
 import subprocess, os
+import io
+import re
+import shutil
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from anthropic import Anthropic
+
+# Common hook names (without .sample suffix)
+_GIT_HOOK_NAMES = (
+    "pre-commit",
+    "prepare-commit-msg",
+    "commit-msg",
+    "post-commit",
+    "pre-rebase",
+    "post-checkout",
+    "post-merge",
+    "pre-push",
+    "pre-receive",
+    "update",
+    "post-receive",
+    "post-update",
+)
+_GIT_HOOK_NAME_SET = frozenset(_GIT_HOOK_NAMES)
+
+# Rule printed around config values by the show/set commands
+_SEP = "-" * 40
+
+# Most estimated tokens of modified-file diffs to send; models such as Claude 3.5 Haiku accept
+# 200k input tokens, and the rest is left for the prompt, history context and new files
+_DIFF_TOKEN_BUDGET = 150_000
+
+
+class NotAGitRepositoryError(Exception):
+    """Raised when git reports that the current directory is not inside a repository."""
 
 
 def check_git_hooks():
@@ -17,47 +51,29 @@ def check_git_hooks():
     """
     result = {"has_native_hooks": False, "has_precommit": False, "native_hooks": [], "precommit_available": False}
 
-    # Check for native git hooks in .git/hooks/
+    # Check for native git hooks in .git/hooks/ with a single directory read
     try:
-        hooks_dir = Path(".git/hooks")
-        if hooks_dir.exists():
-            # Common hook names (without .sample suffix)
-            hook_names = [
-                "pre-commit",
-                "prepare-commit-msg",
-                "commit-msg",
-                "post-commit",
-                "pre-rebase",
-                "post-checkout",
-                "post-merge",
-                "pre-push",
-                "pre-receive",
-                "update",
-                "post-receive",
-                "post-update",
-            ]
-
-            for hook_name in hook_names:
-                hook_path = hooks_dir / hook_name
-                if hook_path.exists() and hook_path.is_file():
+        found_hooks = set()
+        with os.scandir(".git/hooks") as entries:
+            for entry in entries:
+                if entry.name in _GIT_HOOK_NAME_SET and entry.is_file():
                     # Check if it's executable (on Unix-like systems)
-                    if os.name != "nt" and not os.access(hook_path, os.X_OK):
+                    if os.name != "nt" and not os.access(entry.path, os.X_OK):
                         continue  # Skip non-executable hooks
-                    result["native_hooks"].append(hook_name)
+                    found_hooks.add(entry.name)
 
-            result["has_native_hooks"] = len(result["native_hooks"]) > 0
+        # Report hooks in their usual order rather than directory order
+        result["native_hooks"] = [hook_name for hook_name in _GIT_HOOK_NAMES if hook_name in found_hooks]
+        result["has_native_hooks"] = len(result["native_hooks"]) > 0
     except Exception:
         pass  # Ignore errors accessing .git/hooks
 
     # Check for pre-commit framework
     result["has_precommit"] = os.path.exists(".pre-commit-config.yaml")
 
-    # Check if pre-commit command is available
-    try:
-        subprocess.run(["pre-commit", "--version"], capture_output=True, text=True, encoding="utf-8", errors="replace")
-        result["precommit_available"] = True
-    except FileNotFoundError:
-        result["precommit_available"] = False
+    # Check if pre-commit command is available (only matters when there's a config to run)
+    if result["has_precommit"]:
+        result["precommit_available"] = shutil.which("pre-commit") is not None
 
     return result
 
@@ -86,7 +102,7 @@ def should_run_hooks():
             print("Install pre-commit: pip install pre-commit")
             return {"run_precommit": False, "bypass_native": True, "reason": "Pre-commit not installed"}
 
-        print("Pre-commit hooks detected. Run them first? (Y/n): ", end="", flush=True)
+        print("Pre-commit hooks detected. Run them first? (Y/n): ", end="")
         response = input().strip().lower()
 
         if response in ["", "y", "yes"]:
@@ -98,7 +114,7 @@ def should_run_hooks():
     if hook_info["has_native_hooks"]:
         hooks_list = ", ".join(hook_info["native_hooks"])
         print(f"Native git hooks detected: {hooks_list}")
-        print("These will run automatically during commit. Continue? (Y/n): ", end="", flush=True)
+        print("These will run automatically during commit. Continue? (Y/n): ", end="")
         response = input().strip().lower()
 
         if response in ["", "y", "yes"]:
@@ -146,69 +162,75 @@ def run_precommit_hooks():
         return False
 
 
-def get_git_config_key():
-    """Get Anthropic API key from git config."""
+@lru_cache(maxsize=1)
+def _load_cam_config():
+    """
+    Read every cam.* setting from the global git config in a single git call.
+
+    Returns:
+        dict: Mapping of lower-cased config key (e.g. 'cam.apikey') to its value
+    """
     result = subprocess.run(
-        ["git", "config", "--global", "--get", "cam.apikey"],
+        ["git", "config", "--global", "--null", "--get-regexp", r"^cam\."],
         capture_output=True,
         text=True,
         encoding="utf-8",
         errors="replace",
     )
-    return result.stdout.strip()
+
+    # Each entry is "<key>\n<value>\0", so values may safely contain newlines;
+    # when a key repeats, the last value wins like 'git config --get'
+    config = {}
+    for entry in result.stdout.split("\0"):
+        if entry:
+            key, _, value = entry.partition("\n")
+            config[key] = value.strip()
+    return config
+
+
+def _git_set(key, value):
+    """Write a single global git config value."""
+    # stderr stays attached so git's own error (e.g. a locked config file) still reaches the user
+    subprocess.run(["git", "config", "--global", key, value], stdout=subprocess.DEVNULL)
+
+    # Drop cached reads so the new value is seen for the rest of this run
+    _load_cam_config.cache_clear()
+    get_git_config_token_limit.cache_clear()
+    get_git_config_history_limit.cache_clear()
+
+
+def get_git_config_key():
+    """Get Anthropic API key from git config."""
+    return _load_cam_config().get("cam.apikey", "")
 
 
 def get_git_config_model():
     """Get Anthropic API Model from git config."""
-    result = subprocess.run(
-        ["git", "config", "--global", "--get", "cam.model"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    return result.stdout.strip()
+    return _load_cam_config().get("cam.model", "")
 
 
 def get_git_config_instructions():
     """Get custom instruction from git config."""
-    result = subprocess.run(
-        ["git", "config", "--global", "--get", "cam.instructions"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
-    return result.stdout.strip()
+    return _load_cam_config().get("cam.instructions", "")
 
 
+@lru_cache(maxsize=1)
 def get_git_config_token_limit():
     """Get token limit from git config, default to 1024 if not set."""
-    result = subprocess.run(
-        ["git", "config", "--global", "--get", "cam.tokenlimit"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    token_limit = _load_cam_config().get("cam.tokenlimit", "")
     try:
-        return int(result.stdout.strip()) if result.stdout.strip() else 1024
+        return int(token_limit) if token_limit else 1024
     except ValueError:
         print("Error reading value, defaulting to 1024. Update using 'git config --global --set cam.tokenlimit=1234'")
         return 1024
 
 
+@lru_cache(maxsize=1)
 def get_git_config_history_limit():
     """Get history limit from git config, default to 5 if not set."""
-    result = subprocess.run(
-        ["git", "config", "--global", "--get", "cam.historylimit"],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    history_limit = _load_cam_config().get("cam.historylimit", "")
     try:
-        return int(result.stdout.strip()) if result.stdout.strip() else 5
+        return int(history_limit) if history_limit else 5
     except ValueError:
         return 5
 
@@ -216,7 +238,7 @@ def get_git_config_history_limit():
 def estimate_tokens(text):
     """Rough estimate of token count (approximates GPT tokenization)."""
     # Rough approximation: 4 characters per token on average
-    return len(text) // 4
+    return len(text) >> 2
 
 
 def show_token_limit():
@@ -224,9 +246,9 @@ def show_token_limit():
     token_limit = get_git_config_token_limit()
     if token_limit:
         print("\nCurrent token limit:")
-        print("-" * 40)
+        print(_SEP)
         print(token_limit)
-        print("-" * 40)
+        print(_SEP)
     else:
         print("No token limit configured")
 
@@ -238,7 +260,7 @@ def set_token_limit(limit):
         if limit <= 0:
             print("Token limit must be a positive number")
             return False
-        subprocess.run(["git", "config", "--global", "cam.tokenlimit", str(limit)])
+        _git_set("cam.tokenlimit", str(limit))
         print(f"Token limit set to: {limit}")
         return True
     except ValueError:
@@ -250,7 +272,7 @@ def show_history_limit():
     """Display history limit from git config."""
     history_limit = get_git_config_history_limit()
     print(f"\nCurrent history limit: {history_limit} commits")
-    print("-" * 40)
+    print(_SEP)
 
 
 def set_history_limit(limit):
@@ -263,7 +285,7 @@ def set_history_limit(limit):
         if limit > 20:
             print("History limit should be 20 or fewer for performance reasons")
             return False
-        subprocess.run(["git", "config", "--global", "cam.historylimit", str(limit)])
+        _git_set("cam.historylimit", str(limit))
         print(f"History limit set to: {limit}")
         return True
     except ValueError:
@@ -289,17 +311,12 @@ def get_recent_git_history(limit=5):
         if result.returncode != 0:
             return ""
 
-        history = result.stdout.strip()
-        if not history:
+        lines = [line for line in result.stdout.splitlines() if line.strip()]
+        if not lines:
             return ""
 
         # Format the history for better readability
-        formatted_history = []
-        for line in history.split("\n"):
-            if line.strip():
-                formatted_history.append(f"  {line}")
-
-        return f"Recent commit history:\n" + "\n".join(formatted_history)
+        return "Recent commit history:\n" + "\n".join(f"  {line}" for line in lines)
 
     except Exception:
         return ""
@@ -311,18 +328,24 @@ def get_affected_files_history(staged_files, limit=10):
         return ""
 
     try:
-        history_parts = []
+        files = staged_files[:5]  # Limit to first 5 files to avoid too much output
 
-        for file_path in staged_files[:5]:  # Limit to first 5 files to avoid too much output
-            # Get recent commits that modified this file
-            result = subprocess.run(
-                ["git", "log", "--oneline", f"-{limit}", "--", file_path],
+        def get_file_log(file_path):
+            # Get recent commits that modified this file (no more than the 3 that are shown)
+            return subprocess.run(
+                ["git", "log", "--oneline", f"-{min(limit, 3)}", "--", file_path],
                 capture_output=True,
                 text=True,
                 encoding="utf-8",
                 errors="replace",
             )
 
+        # Each file's log is an independent git call, so run them concurrently (map keeps file order)
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            results = list(executor.map(get_file_log, files))
+
+        history_parts = []
+        for file_path, result in zip(files, results):
             if result.returncode == 0 and result.stdout.strip():
                 file_history = result.stdout.strip().split("\n")
                 if file_history and file_history[0]:  # Only add if there's actual history
@@ -371,11 +394,11 @@ def append_instruction(new_instruction):
     if not combined.endswith("."):
         combined += "."
 
-    subprocess.run(["git", "config", "--global", "cam.instructions", combined])
+    _git_set("cam.instructions", combined)
     print("\nUpdated instructions:")
-    print("-" * 40)
+    print(_SEP)
     print(combined)
-    print("-" * 40)
+    print(_SEP)
 
 
 def show_instructions():
@@ -383,9 +406,9 @@ def show_instructions():
     instructions = get_git_config_instructions()
     if instructions:
         print("\nCurrent instructions:")
-        print("-" * 40)
+        print(_SEP)
         print(instructions)
-        print("-" * 40)
+        print(_SEP)
     else:
         print("No instructions configured")
 
@@ -396,11 +419,11 @@ def set_instructions(new_instructions):
     if new_instructions and not new_instructions.endswith("."):
         new_instructions += "."
 
-    subprocess.run(["git", "config", "--global", "cam.instructions", new_instructions])
+    _git_set("cam.instructions", new_instructions)
     print("\nInstructions updated successfully:")
-    print("-" * 40)
+    print(_SEP)
     print(new_instructions)
-    print("-" * 40)
+    print(_SEP)
 
 
 def setup_api_key():
@@ -420,16 +443,19 @@ def setup_api_key():
     if not api_key and existing_key:
         api_key = existing_key
 
+    # Collect the new settings; they're written together once all prompts are answered
+    updates = {}
+
     # Save API key if provided
     if api_key:
-        subprocess.run(["git", "config", "--global", "cam.apikey", api_key])
+        updates["cam.apikey"] = api_key
 
     # Prompt for model with default value
     model_prompt = f" [{default_model}]"
     model = input(f"Enter preferred Claude model{model_prompt}: ").strip()
     if not model:
         model = default_model
-    subprocess.run(["git", "config", "--global", "cam.model", model])
+    updates["cam.model"] = model
 
     # Prompt for instructions with existing value as default
     instructions_prompt = f" [{existing_instructions}]" if existing_instructions else ""
@@ -437,7 +463,7 @@ def setup_api_key():
     if not instructions and existing_instructions:
         instructions = existing_instructions
     if instructions:
-        subprocess.run(["git", "config", "--global", "cam.instructions", instructions])
+        updates["cam.instructions"] = instructions
 
     # Prompt for history limit with existing value as default
     history_prompt = f" [{existing_history_limit}]"
@@ -448,27 +474,132 @@ def setup_api_key():
     try:
         history_limit_int = int(history_limit)
         if 0 <= history_limit_int <= 20:
-            subprocess.run(["git", "config", "--global", "cam.historylimit", history_limit])
+            updates["cam.historylimit"] = history_limit
         else:
             print("History limit must be between 0-20, using default of 5")
-            subprocess.run(["git", "config", "--global", "cam.historylimit", "5"])
+            updates["cam.historylimit"] = "5"
     except ValueError:
         print("Invalid history limit, using default of 5")
-        subprocess.run(["git", "config", "--global", "cam.historylimit", "5"])
+        updates["cam.historylimit"] = "5"
+
+    # Only spawn git for settings that actually changed
+    existing = {
+        "cam.apikey": existing_key,
+        "cam.model": existing_model,
+        "cam.instructions": existing_instructions,
+        "cam.historylimit": str(existing_history_limit),
+    }
+    for key, value in updates.items():
+        if value != existing[key]:
+            _git_set(key, value)
 
     print("Configuration saved")
 
 
+def _decode_path(path):
+    """Decode a path from raw git output."""
+    return path.decode("utf-8", errors="replace")
+
+
+class _GitSession:
+    """
+    Long-lived 'git cat-file' processes for looking up blobs by object id.
+
+    Each process is started on first use and then reused, so sizing and reading any number
+    of blobs costs at most two git processes. Use as a context manager to close them.
+    """
+
+    def __init__(self):
+        self._processes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, mode, object_id):
+        """Send an object id lookup to the cat-file process for mode and return (process, header fields)."""
+        process = self._processes.get(mode)
+        if process is None:
+            process = subprocess.Popen(["git", "cat-file", mode], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._processes[mode] = process
+
+        # The protocol is one request per line, so ids are sent rather than ':<path>' lookups,
+        # which would break on paths containing a newline
+        process.stdin.write(object_id + b"\n")
+        process.stdin.flush()
+        return process, process.stdout.readline().split()
+
+    def blob_size(self, object_id):
+        """Return the size of the blob object_id in bytes, or None if it isn't a blob."""
+        # Header is "<type> <size>", or "<object> missing"
+        _, header = self._request("--batch-check=%(objecttype) %(objectsize)", object_id)
+        if len(header) == 2 and header[0] == b"blob":
+            return int(header[1])
+        return None
+
+    def read_blob(self, object_id):
+        """Return the decoded content of the blob object_id, or None if it doesn't exist."""
+        # Header is "<size>", or "<object> missing"
+        process, header = self._request("--batch=%(objectsize)", object_id)
+        if len(header) != 1 or not header[0].isdigit():
+            return None
+
+        # Blob content is followed by a single newline terminator
+        blob = process.stdout.read(int(header[0]) + 1)[:-1]
+        return blob.decode("utf-8", errors="replace")
+
+    def close(self):
+        """Shut down any cat-file processes that were started."""
+        for process in self._processes.values():
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+        self._processes.clear()
+
+
+def _get_staged_diff(paths):
+    """Return the staged diff of the given paths as text."""
+    # Paths are passed literally so names containing glob characters can't match other files,
+    # and color/external diff settings are overridden so every section starts with "diff --git".
+    # Output is captured as bytes and decoded in one step: text mode would also rewrite every
+    # line ending, two more passes over what can be megabytes of diff
+    return subprocess.run(
+        ["git", "--literal-pathspecs", "diff", "--cached", "--no-color", "--no-ext-diff", "--"] + paths,
+        capture_output=True,
+    ).stdout.decode("utf-8", errors="replace")
+
+
+def _format_new_file(file, content):
+    """Wrap a new file's staged content in the start/end markers used in the diff sent to Claude."""
+    return f"\nContent of new file '{file}':\n[START OF FILE '{file}']\n{content.rstrip()}\n[END OF FILE '{file}']"
+
+
 def get_filtered_diff():
-    """Get staged diff with filtered new/moved/deleted files."""
-    # Get list of staged files and their statuses
-    status = subprocess.run(
-        ["git", "status", "--porcelain"],
+    """
+    Get staged diff with filtered new/moved/deleted files.
+
+    Returns:
+        tuple: (diff, omitted_files)
+               diff: The diff text to send to Claude, or "" if nothing is staged
+               omitted_files: Paths whose content was left out to keep the diff within the token budget
+    """
+    # Get list of staged files with their statuses and blob ids (NUL-separated, so paths are never quoted)
+    result = subprocess.run(
+        ["git", "diff", "--cached", "--raw", "-z", "--no-abbrev"],
         capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    ).stdout
+    )
+
+    # This is the first git call of a commit run, so it doubles as the repository check.
+    # Outside a repository 'git diff' falls back to --no-index mode and rejects --cached.
+    if result.returncode != 0 and (b"not a git repository" in result.stderr or b"--no-index" in result.stderr):
+        raise NotAGitRepositoryError(_decode_path(result.stderr).strip())
+    status = result.stdout
+
+    # Nothing staged: no further git calls are needed
+    if not status:
+        return "", []
 
     # Initialize lists for different file categories
     modified_files = []
@@ -476,91 +607,110 @@ def get_filtered_diff():
     moved_files = []
     deleted_files = []
 
-    # Parse status output
-    for line in status.splitlines():
-        if not line.startswith(" "):  # Only look at staged files
-            status_code = line[:2]
-            file_path = line[3:]
-
-            if status_code.startswith("R"):
-                old_path, new_path = file_path.split(" -> ")
-                moved_files.append((old_path, new_path))
-            elif status_code.startswith("A"):
-                new_files.append(file_path)
-            elif status_code.startswith("M"):
-                modified_files.append(file_path)
-            elif status_code.startswith("D"):
-                deleted_files.append(file_path)
-
-    # Build the diff output
-    diff_parts = []
+    # Parse status output; each record is ":<src mode> <dst mode> <src id> <dst id> <status>\0<path>\0",
+    # with a second path for renames/copies
+    fields = iter(status.split(b"\0"))
+    for record in fields:
+        if not record:
+            continue
+        _, _, _, blob_id, status_code = record.split()
+        file_path = next(fields, b"")
+        change_type = status_code[:1]
+
+        if change_type in (b"R", b"C"):
+            new_path = next(fields, b"")
+            if change_type == b"R":
+                moved_files.append((_decode_path(file_path), _decode_path(new_path)))
+        elif change_type == b"A":
+            new_files.append((_decode_path(file_path), blob_id))
+        elif change_type == b"M":
+            modified_files.append(_decode_path(file_path))
+        elif change_type == b"D":
+            deleted_files.append(_decode_path(file_path))
+
+    # Size new files by their staged blobs and read the content of those under 8KB
+    new_file_contents = []
+    if new_files:
+        try:
+            with _GitSession() as session:
+                for file, blob_id in new_files:
+                    file_size = session.blob_size(blob_id)
+                    if file_size is None or file_size >= 8192:  # 8KB = 8192 bytes
+                        continue
+
+                    file_content = session.read_blob(blob_id)
+                    if file_content:
+                        new_file_contents.append((file, file_content))
+        except (OSError, subprocess.SubprocessError):
+            pass  # Skip file contents if there's any error talking to git
+
+    modified_diffs = []
+    if modified_files:
+        # Diff all modified files in one git call, then split it back into per-file chunks
+        combined_diff = _get_staged_diff(modified_files)
+
+        # Git emits one "diff --git" section per path, in the same order as the --raw listing above,
+        # so pair chunks with the real paths instead of parsing (possibly quoted) header names
+        chunks = re.split(r"^(?=diff --git )", combined_diff, flags=re.M)[1:]
+        if len(chunks) != len(modified_files):
+            # Sections can't be matched to paths reliably, so diff each file on its own instead
+            chunks = [_get_staged_diff([file]) for file in modified_files]
+        modified_diffs = list(zip(modified_files, chunks))
+
+    # A diff that can't fit in the model's context window only makes the request fail, so leave
+    # out the largest new-file contents and modifications until the rest fits within the budget
+    entries = new_file_contents + modified_diffs
+    entry_tokens = [estimate_tokens(text) for _, text in entries]
+    total_tokens = sum(entry_tokens)
+    omitted = set()
+    for index in sorted(range(len(entries)), key=entry_tokens.__getitem__, reverse=True):
+        if total_tokens <= _DIFF_TOKEN_BUDGET:
+            break
+        total_tokens -= entry_tokens[index]
+        omitted.add(index)
+
+    def entry_text(index, kind):
+        if index in omitted:
+            return f"({kind.capitalize()} omitted: roughly {entry_tokens[index]} tokens, too large to include)\n"
+        return entries[index][1]
+
+    # Build the diff output in a single buffer, one line per write
+    buf = io.StringIO()
+
+    def write_line(text=""):
+        buf.write(text)
+        buf.write("\n")
 
     if deleted_files:
-        diff_parts.append("Deleted files (-):")
+        write_line("Deleted files (-):")
         for file in deleted_files:
-            diff_parts.append(f"- {file}")
-        diff_parts.append("")
+            write_line(f"- {file}")
+        write_line()
 
-    new_file_parts = []
     if new_files:
-        diff_parts.append("New files added (+):")
-        for file in new_files:
-            diff_parts.append(f"+ {file}")
+        write_line("New files added (+):")
+        for file, _ in new_files:
+            write_line(f"+ {file}")
+        write_line()
 
-            # Check if file exists and is under 8KB
-            try:
-                file_size = os.path.getsize(file)
-                if file_size < 8192:  # 8KB = 8192 bytes
-                    # Get the file content using git show
-                    file_content = subprocess.run(
-                        ["git", "show", f":{file}"],
-                        capture_output=True,
-                        text=True,
-                        encoding="utf-8",
-                        errors="replace",
-                    ).stdout
-
-                    if file_content:
-                        new_file_parts.append("\nContent of new file '" + file + "':")
-                        new_file_parts.append("[START OF FILE '" + file + "']")
-                        new_file_parts.append(file_content.rstrip())
-                        new_file_parts.append("[END OF FILE '" + file + "']")
-            except (OSError, subprocess.SubprocessError):
-                # Skip if there's any error accessing the file
-                continue
-        diff_parts.append("")
-
-    if new_file_parts:
-        diff_parts += new_file_parts
+        for index, (file, _) in enumerate(new_file_contents):
+            write_line(_format_new_file(file, entry_text(index, "content")))
 
     if moved_files:
-        diff_parts.append("Files moved:")
+        write_line("Files moved:")
         for old, new in moved_files:
-            diff_parts.append(f"→ {old} -> {new}")
-        diff_parts.append("")
+            write_line(f"→ {old} -> {new}")
+        write_line()
 
     if modified_files:
-        diff_parts.append("Modified files (~):")
-        for file in modified_files:
-            file_diff = subprocess.run(
-                ["git", "diff", "--cached", file],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-            ).stdout
-            if file_diff:
-                diff_parts.append(f"~ {file}")
-                diff_parts.append("[START OF MODIFICATIONS FOR '" + file + "']")
-                diff_parts.append(file_diff)
-                diff_parts.append("[END OF MODIFICATIONS FOR '" + file + "']")
-
-    if diff_parts:
-        return "\n".join(diff_parts)
-    elif deleted_files or new_files or moved_files:
-        return "\n".join(diff_parts)
-    else:
-        return ""
+        write_line("Modified files (~):")
+        for index, (file, _) in enumerate(modified_diffs, len(new_file_contents)):
+            write_line(f"~ {file}")
+            write_line(f"[START OF MODIFICATIONS FOR '{file}']")
+            write_line(entry_text(index, "modifications"))
+            write_line(f"[END OF MODIFICATIONS FOR '{file}']")
+
+    return buf.getvalue(), [entries[index][0] for index in sorted(omitted)]
 
 
 def get_contextual_history():
@@ -570,12 +720,18 @@ def get_contextual_history():
     if history_limit <= 0:
         return ""
 
-    # Get general recent history
-    recent_history = get_recent_git_history(history_limit)
+    # The general and file-specific lookups are independent, so run their git calls concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Get general recent history
+        recent_future = executor.submit(get_recent_git_history, history_limit)
 
-    # Get staged files for file-specific history
-    staged_files = get_staged_files()
-    file_history = get_affected_files_history(staged_files, min(history_limit, 10))
+        # Get staged files for file-specific history
+        file_future = executor.submit(
+            lambda: get_affected_files_history(get_staged_files(), min(history_limit, 10))
+        )
+
+        recent_history = recent_future.result()
+        file_history = file_future.result()
 
     # Combine histories
     context_parts = []
@@ -587,14 +743,68 @@ def get_contextual_history():
     return "\n".join(context_parts) if context_parts else ""
 
 
-import time
-from anthropic import Anthropic
-from git_cam.classes import CLIFormatter
+# Longest wait between API retries, whether from backoff or a server's retry-after header
+_MAX_RETRY_DELAY = 60
+
+
+def _get_retry_delay(error, attempt):
+    """
+    Work out how long to wait before retrying a failed API call.
+
+    Args:
+        error: The exception raised by the failed call
+        attempt: Zero-based index of the failed attempt
+
+    Returns:
+        float: Seconds to wait, taken from the response's retry-after header when present,
+               otherwise exponential backoff with jitter; never more than _MAX_RETRY_DELAY
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        # retry-after is either a number of seconds or an HTTP date; cap it so a server asking
+        # for a long pause can't leave the CLI sleeping silently for minutes or hours
+        try:
+            return min(_MAX_RETRY_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(_MAX_RETRY_DELAY, max(0.0, delay))
+            except (TypeError, ValueError):
+                pass
+
+    # Jitter stops several clients that failed together from retrying in lockstep
+    return min(_MAX_RETRY_DELAY, 2 ** (attempt + 1) + random.uniform(0, 1))
+
+
+# Anthropic clients by API key, so the review and the commit message share one connection pool
+_client_cache = {}
+
+
+def _get_client(api_key):
+    """
+    Get an Anthropic client for the given API key, creating it on first use.
+
+    Args:
+        api_key: Anthropic API key
+
+    Returns:
+        Anthropic: Client shared by every API call made with this key
+    """
+    client = _client_cache.get(api_key)
+    if client is None:
+        from anthropic import Anthropic
+
+        # Retries are handled by call_anthropic_with_retry, so don't let the SDK retry as well
+        client = _client_cache[api_key] = Anthropic(api_key=api_key, max_retries=0)
+    return client
 
 
 def call_anthropic_with_retry(client, model, max_tokens, messages, operation_name="API call"):
     """
-    Call Anthropic API with retry logic for temporary failures.
+    Call Anthropic API with retry logic for temporary failures, streaming the response.
 
     Args:
         client: Anthropic client instance
@@ -604,26 +814,35 @@ def call_anthropic_with_retry(client, model, max_tokens, messages, operation_nam
         operation_name: Description of operation for user feedback
 
     Returns:
-        API response message
+        str: The response text
 
     Raises:
         Exception: If all retries are exhausted
     """
-    retry_delays = [5, 10, 60]  # seconds to wait between retries
+    from anthropic import APIConnectionError
+    from git_cam.classes import CLIFormatter
+
+    max_retries = 5
 
-    for attempt in range(len(retry_delays) + 1):  # +1 for initial attempt
+    for attempt in range(max_retries + 1):  # +1 for initial attempt
         try:
-            return client.messages.create(
+            # Streaming also lifts the SDK's refusal of long non-streaming requests at high token limits;
+            # an error part-way through the stream is retried from the start like any other failure
+            with client.messages.stream(
                 model=model,
                 max_tokens=max_tokens,
                 messages=messages,
-            )
+            ) as stream:
+                return "".join(stream.text_stream)
         except Exception as e:
             error_str = str(e)
 
-            # Check if this is a retryable error
+            # Check if this is a retryable error (the SDK's own retries are off, so this has to cover
+            # everything it would have retried: dropped connections, timeouts and these status codes)
             is_retryable = (
-                "529" in error_str  # Overloaded
+                isinstance(e, APIConnectionError)  # Includes APITimeoutError
+                or getattr(e, "status_code", None) in (408, 409, 429, 500, 502, 503, 504, 529)
+                or "529" in error_str  # Overloaded
                 or "overloaded" in error_str.lower()
                 or "rate_limit" in error_str.lower()
                 or "timeout" in error_str.lower()
@@ -632,68 +851,35 @@ def call_anthropic_with_retry(client, model, max_tokens, messages, operation_nam
                 or "504" in error_str  # Gateway Timeout
             )
 
-            if not is_retryable or attempt >= len(retry_delays):
+            if not is_retryable or attempt >= max_retries:
                 # Either not retryable or we've exhausted all retries
                 raise e
 
             # Wait and retry
-            delay = retry_delays[attempt]
+            delay = _get_retry_delay(e, attempt)
             print(CLIFormatter.warning(f"{operation_name} failed (attempt {attempt + 1}): {error_str}"))
-            print(CLIFormatter.input_prompt(f"Retrying in {delay} seconds..."))
+            print(CLIFormatter.input_prompt(f"Retrying in {delay:.1f} seconds..."))
             time.sleep(delay)
 
     # This shouldn't be reached, but just in case
     raise Exception("Maximum retries exceeded")
 
 
-def generate_commit_message(
-    diff,
-    review_content,
-    user_context,
-    config_instructions,
-    api_key,
-    api_model,
-    skip_hooks=False,
-    hook_bypass_reason="",
-):
-    """Generate commit message using Claude with git history context."""
-    client = Anthropic(api_key=api_key)
-
-    context_section = f"\nUser provided context:\n{user_context}" if user_context else ""
-
-    # Get git history context
-    history_context = get_contextual_history()
-    history_section = f"\nGit History Context:\n{history_context}" if history_context else ""
-
-    # Add hook skip context
-    hook_context = ""
-    if skip_hooks:
-        hook_context = f"\nIMPORTANT: This commit will bypass git hooks (--no-verify) because pre-commit checks failed but the user chose to proceed anyway."
-        if hook_bypass_reason:
-            hook_context += f" Reason given: '{hook_bypass_reason}'"
-        hook_context += " Consider if this context should be reflected in the commit message."
-
-    message = call_anthropic_with_retry(
-        client,
-        api_model,
-        get_git_config_token_limit(),
-        [
-            {
-                "role": "user",
-                "content": f"""Analyse this git diff and code review to generate a commit message. Use insights from the review, git history context, and any user-provided context to make the commit message more descriptive of the changes' purpose and impact.
+# Commit message prompt, built once at import; only the placeholders are filled in per request
+_COMMIT_PROMPT = """Analyse this git diff and code review to generate a commit message. Use insights from the review, git history context, and any user-provided context to make the commit message more descriptive of the changes' purpose and impact.
 
 Pay attention to the git history context - if this appears to be a follow-up, correction, or completion of a recent commit (e.g., fixing a missed file in a version update, correcting a typo, or completing an incomplete change), reflect this relationship in the commit message.
 
 Be as concise as possible and avoid exaggerating minor changes to be more impactful than they are. The git history helps you understand the development patterns and context of this repository.
 
 Code Review:
-{review_content}
+{review}
 
 User context [Start]: {context_section} [end user context]
 
 {history_section}{hook_context}
 
-Global system instructions [Start]: {config_instructions} [end system instructions]
+Global system instructions [Start]: {instructions} [end system instructions]
 
 Return ONLY a string with a single key "message:" containing the commit message, e.g:
 message:First line: Brief summary (max 50 chars)
@@ -702,30 +888,11 @@ message:First line: Brief summary (max 50 chars)
 
 Here's the diff:
 
-{diff}""",
-            }
-        ],
-        "Commit message generation",
-    )
-    return message.content[0].text.split("message:", 1)[1].strip()
+{diff}"""
 
 
-def perform_code_review(diff, api_key, api_model, config_instructions):
-    """Perform an AI code review on the changes with git history context."""
-    client = Anthropic(api_key=api_key)
-
-    # Get git history context
-    history_context = get_contextual_history()
-    history_section = f"\nGit History Context:\n{history_context}\n" if history_context else ""
-
-    message = call_anthropic_with_retry(
-        client,
-        api_model,
-        get_git_config_token_limit(),
-        [
-            {
-                "role": "user",
-                "content": f"""Review this git diff for potential issues. The git history context helps you understand recent development patterns and the evolution of these files. Consider whether this change appears to be completing or correcting a recent commit.
+# Code review prompt, built once at import; only the placeholders are filled in per request
+_REVIEW_PROMPT = """Review this git diff for potential issues. The git history context helps you understand recent development patterns and the evolution of these files. Consider whether this change appears to be completing or correcting a recent commit.
 
 Look especially carefully for:
 - Files that should NEVER be committed to version control:
@@ -780,7 +947,7 @@ What counts as critical (requiring STOP_COMMIT):
 - Broken syntax or code that won't run
 - Hardcoded sensitive values or development-only code
 
-{history_section}Global system instructions [Start]: {config_instructions} [end system instructions]
+{history_section}Global system instructions [Start]: {instructions} [end system instructions]
 
 Return your response in this format:
 review:
@@ -792,9 +959,89 @@ Only comment on what is actually being changed in this commit. Do not suggest fe
 
 Here's the diff (remember, lines starting with + have been added, lines starting with - are removed):
 
-{diff}""",
+{diff}"""
+
+
+def generate_commit_message(
+    diff,
+    review_content,
+    user_context,
+    config_instructions,
+    api_key,
+    api_model,
+    skip_hooks=False,
+    hook_bypass_reason="",
+    history_context=None,
+):
+    """Generate commit message using Claude with git history context."""
+    client = _get_client(api_key)
+    token_limit = get_git_config_token_limit()
+
+    context_section = f"\nUser provided context:\n{user_context}" if user_context else ""
+
+    # Get git history context, unless the caller already gathered it
+    if history_context is None:
+        history_context = get_contextual_history()
+    history_section = f"\nGit History Context:\n{history_context}" if history_context else ""
+
+    # Add hook skip context
+    hook_context = ""
+    if skip_hooks:
+        hook_context = f"\nIMPORTANT: This commit will bypass git hooks (--no-verify) because pre-commit checks failed but the user chose to proceed anyway."
+        if hook_bypass_reason:
+            hook_context += f" Reason given: '{hook_bypass_reason}'"
+        hook_context += " Consider if this context should be reflected in the commit message."
+
+    response_text = call_anthropic_with_retry(
+        client,
+        api_model,
+        token_limit,
+        [
+            {
+                "role": "user",
+                "content": _COMMIT_PROMPT.format_map(
+                    {
+                        "review": review_content,
+                        "context_section": context_section,
+                        "history_section": history_section,
+                        "hook_context": hook_context,
+                        "instructions": config_instructions,
+                        "diff": diff,
+                    }
+                ),
+            }
+        ],
+        "Commit message generation",
+    )
+    return response_text.split("message:", 1)[1].strip()
+
+
+def perform_code_review(diff, api_key, api_model, config_instructions, history_context=None):
+    """Perform an AI code review on the changes with git history context."""
+    client = _get_client(api_key)
+    token_limit = get_git_config_token_limit()
+
+    # Get git history context, unless the caller already gathered it
+    if history_context is None:
+        history_context = get_contextual_history()
+    history_section = f"\nGit History Context:\n{history_context}\n" if history_context else ""
+
+    response_text = call_anthropic_with_retry(
+        client,
+        api_model,
+        token_limit,
+        [
+            {
+                "role": "user",
+                "content": _REVIEW_PROMPT.format_map(
+                    {
+                        "history_section": history_section,
+                        "instructions": config_instructions,
+                        "diff": diff,
+                    }
+                ),
             }
         ],
         "Code review",
     )
-    return message.content[0].text.split("review:", 1)[1].strip()
+    return response_text.split("review:", 1)[1].strip()